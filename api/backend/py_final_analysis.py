@@ -1,7 +1,8 @@
 import os
 import json
 import time
-from openai import OpenAI, RateLimitError, BadRequestError
+from openai import RateLimitError, BadRequestError
+from api.backend.py_openai_client import get_openai_client, is_openai_debug_enabled
 
 # Define the absolute path to the project root. This is robust for both local and Vercel execution.
 # We go up two levels from `api/backend/` to reach the root.
@@ -9,32 +10,45 @@ PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..
 
 # --- Globals for caching ---
 _question_set = {} # Cache for question set content
+#: (set_id, mtime_ns, size) of the file `_question_set` was loaded from; used to skip unchanged re-reads.
+_question_set_fingerprint = None
 
 def load_question_set(set_id):
     """
     @brief Loads and caches a question set from a file.
     @description Reads the specified question set JSON file from the public/questions
     directory. It uses a global variable to cache the data, preventing
-    repeated file reads. The path is constructed relative to the project
-    root to ensure it works in both local and serverless environments.
+    repeated file reads. The cache is keyed by the file name together with the
+    file's modification time and size, so the file is only parsed again when a
+    different set is requested or the file changes on disk. The path is
+    constructed relative to the project root to ensure it works in both local
+    and serverless environments.
     @param set_id The name of the question set JSON file (e.g., "q4.json").
     @return A dictionary containing the question set data.
     @related_to app.config.json: The filename is read from the app config.
     """
-    global _question_set
+    global _question_set, _question_set_fingerprint
     # Construct absolute path
     file_path = os.path.join(PROJECT_ROOT, 'public', 'questions', set_id)
 
-    # Load file if not cached or if a different set_id is requested
-    if not _question_set or _question_set.get('version') != set_id: # A simple check
+    try:
+        stat = os.stat(file_path)
+        fingerprint = (set_id, stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        fingerprint = None
+
+    # Load file if not cached, if a different set_id is requested or if the file has changed
+    if fingerprint is None or fingerprint != _question_set_fingerprint:
         try:
             print(f"[Data] Loading question set from: {file_path}")
             with open(file_path, 'r', encoding='utf-8') as f:
                 _question_set = json.load(f)
+            _question_set_fingerprint = fingerprint
         except Exception as e:
             print(f"!!! CRITICAL: Could not load or parse question set {file_path}. Error: {e}")
             # Return empty data to prevent a hard crash
             _question_set = {"questions": []}
+            _question_set_fingerprint = None
 
     return _question_set
 
@@ -60,16 +74,15 @@ def format_data_for_prompt(context_config, answers, scores):
     # more sophisticated logic for finding question text by ID and formatting.
     # This should be expanded to match that for full fidelity.
     
-    formatted_string = "Context:\n"
+    # Collect the lines and join them once instead of growing a string on every item
+    lines = ["Context:"]
     if context_config.get("include_answers", []) == ["all"]:
-         for q_id, answer in answers.items():
-              formatted_string += f"- {q_id}: {answer}\n"
+         lines.extend(f"- {q_id}: {answer}" for q_id, answer in answers.items())
 
     if context_config.get("include_scores"):
-        for q_id, score in scores.items():
-            formatted_string += f"- Score for {q_id}: {score}\n"
+        lines.extend(f"- Score for {q_id}: {score}" for q_id, score in scores.items())
             
-    return formatted_string
+    return '\n'.join(lines) + '\n'
 
 
 def final_analysis_logic(section_index, answers, scores, final_analysis_config, config):
@@ -83,6 +96,7 @@ def final_analysis_logic(section_index, answers, scores, final_analysis_config,
                 and the `specific_prompt` for the section.
              4. Calls the OpenAI API using the model and parameters defined in the section's configuration.
              5. Implements a robust retry loop with exponential backoff to handle API rate limiting.
+                The number of attempts and the delays come from `Backend.retry_logic` in the app config.
 
     @param section_index (int): The zero-based index of the report section to generate.
     @param answers (dict): All user answers.
@@ -93,6 +107,8 @@ def final_analysis_logic(section_index, answers, scores, final_analysis_config,
 
     @returns {dict}: A dictionary containing the generated 'report' content as a string.
 
+    @raises RateLimitError: If the API is still rate limiting after `max_attempts` attempts.
+
     @side_effects Makes one or more external API calls to OpenAI.
 
     @related_to py_local_api_server.py: This function is called by the `/api/final-analysis.mjs` endpoint.
@@ -107,34 +123,40 @@ def final_analysis_logic(section_index, answers, scores, final_analysis_config,
     full_prompt = f"{base_prompt}\n\n{context_data_str}\n\n{specific_prompt}"
 
     # --- OpenAI API Call with Retry Logic ---
-    client = OpenAI(api_key=os.getenv("REACT_APP_GPT_KEY"), project=os.getenv("REACT_APP_PROJECT_ID"))
+    client = get_openai_client()
+    debug_enabled = is_openai_debug_enabled()
+
+    # The request parameters don't change between retries, so resolve them once
+    model_config_from_json = section_config.get('model_config', {})
+    openai_config_from_app = config.get("Backend", {}).get("openai", {})
+
+    model = model_config_from_json.get('model', 'gpt-4o')
+    temperature = model_config_from_json.get('temperature', openai_config_from_app.get('default_temperature', 0.3))
+    max_tokens = model_config_from_json.get('max_output_tokens', openai_config_from_app.get('default_max_tokens', 1024))
+    stream = model_config_from_json.get('stream', False)
+
+    request_payload = {
+        "model": model,
+        "messages": [{"role": "user", "content": full_prompt}],
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+        "stream": stream,
+        "response_format": {"type": "json_object"}
+    }
     
+    retry_config = config.get("Backend", {}).get("retry_logic", {})
+    max_attempts = retry_config.get("max_attempts", 5)
+    initial_delay = float(retry_config.get("initial_delay_seconds", 1.0))
+    max_delay = float(retry_config.get("max_delay_seconds", 30.0))
+
     attempt = 0
-    initial_delay = 1.0
-    max_delay = 30.0
 
     while True:
         try:
-            model_config_from_json = section_config.get('model_config', {})
-            openai_config_from_app = config.get("Backend", {}).get("openai", {})
-
-            model = model_config_from_json.get('model', 'gpt-4o')
-            temperature = model_config_from_json.get('temperature', openai_config_from_app.get('default_temperature', 0.3))
-            max_tokens = model_config_from_json.get('max_output_tokens', openai_config_from_app.get('default_max_tokens', 1024))
-            stream = model_config_from_json.get('stream', False)
-
-            request_payload = {
-                "model": model,
-                "messages": [{"role": "user", "content": full_prompt}],
-                "max_tokens": max_tokens,
-                "temperature": temperature,
-                "stream": stream,
-                "response_format": {"type": "json_object"}
-            }
-
-            print("\n--- DEBUG: OpenAI Request (Final Analysis) ---")
-            print(json.dumps(request_payload, indent=2))
-            print("----------------------------------------------\n")
+            if debug_enabled:
+                print("\n--- DEBUG: OpenAI Request (Final Analysis) ---")
+                print(json.dumps(request_payload, indent=2))
+                print("----------------------------------------------\n")
 
             try:
                 completion = client.chat.completions.create(**request_payload)
@@ -152,15 +174,19 @@ def final_analysis_logic(section_index, answers, scores, final_analysis_config,
                     # Handle non-streaming response (the whole object comes at once)
                     response_content = completion.choices[0].message.content
 
-                print("\n--- DEBUG: OpenAI Response (Final Analysis) ---")
-                print(response_content)
-                print("-----------------------------------------------\n")
+                if debug_enabled:
+                    print("\n--- DEBUG: OpenAI Response (Final Analysis) ---")
+                    print(response_content)
+                    print("-----------------------------------------------\n")
 
                 # The rest of the logic expects a JSON object string
                 result_json = json.loads(response_content)
                 
                 return result_json
 
+            except RateLimitError:
+                # Let the outer handler back off and retry
+                raise
             except BadRequestError as e:
                 print(f"!!! OpenAI BadRequestError: {e}")
                 # This error often happens if the prompt is malformed or violates policy
@@ -171,6 +197,9 @@ def final_analysis_logic(section_index, answers, scores, final_analysis_config,
 
         except RateLimitError as e:
             attempt += 1
+            if attempt >= max_attempts:
+                print(f"Rate limit exceeded on final analysis. Giving up after {attempt} attempts.")
+                raise
             retry_after_ms_str = e.response.headers.get('retry-after-ms')
             api_wait_time = float(retry_after_ms_str) / 1000.0 if retry_after_ms_str else 0
             
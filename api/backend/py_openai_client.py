@@ -0,0 +1,34 @@
+import os
+from openai import OpenAI
+
+# --- Globals for caching ---
+#: Process-wide OpenAI client, shared by all request handlers so HTTP connections are reused.
+_openai_client = None
+
+def get_openai_client():
+    """
+    @brief Returns the shared OpenAI client, creating it on first use.
+    @description Constructing an `OpenAI` client sets up a new HTTP connection pool, so
+    building one per request forces a fresh TCP/TLS handshake for every API call. This
+    function creates the client once per process and hands the same instance to every
+    caller. Creation is deferred until the first request so that the credentials loaded
+    from `.env` by the server are already present in the environment.
+    @return The shared `OpenAI` client instance.
+    @related_to py_simple_evaluate.py, py_final_analysis.py: Both call the API through this client.
+    """
+    global _openai_client
+    if _openai_client is None:
+        _openai_client = OpenAI(api_key=os.getenv("REACT_APP_GPT_KEY"), project=os.getenv("REACT_APP_PROJECT_ID"))
+    return _openai_client
+
+def is_openai_debug_enabled():
+    """
+    @brief Tells whether full OpenAI request/response payloads should be logged.
+    @description Dumping the payloads means pretty-printing the whole prompt and the
+    raw model response on every call, which is slow and floods the logs, so it is
+    opt-in via the `PREDICTEX_DEBUG_OPENAI` environment variable ("1", "true" or
+    "yes"). The variable is read on each call rather than at import time because the
+    local server loads `.env` after the backend modules are imported.
+    @return True if payload logging is enabled, otherwise False.
+    """
+    return os.getenv("PREDICTEX_DEBUG_OPENAI", "").strip().lower() in ("1", "true", "yes")
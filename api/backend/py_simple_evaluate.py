@@ -1,7 +1,8 @@
 import os
 import json
 import time
-from openai import OpenAI, RateLimitError
+from openai import RateLimitError
+from api.backend.py_openai_client import get_openai_client, is_openai_debug_enabled
 
 # Define the absolute path to the project root. This is robust for both local and Vercel execution.
 # We go up two levels from `api/backend/` to reach the root.
@@ -9,6 +10,8 @@ PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..
 
 # --- Globals for caching ---
 _questions_data = {} # Cache for question file content
+#: Maps question ID to its question object, built once when the question file is loaded.
+_questions_by_id = {}
 #: Stores the content of the main AI prompt file.
 _ai_prompt = ''
 
@@ -24,7 +27,7 @@ def load_questions_data(question_file, prompt_file):
     @return A tuple containing the loaded questions data (dict) and AI prompt (str).
     @related_to app.config.json: The filenames are read from the app config.
     """
-    global _questions_data, _ai_prompt
+    global _questions_data, _questions_by_id, _ai_prompt
 
     # Construct absolute paths
     questions_path = os.path.join(PROJECT_ROOT, 'public', 'questions', question_file)
@@ -40,6 +43,15 @@ def load_questions_data(question_file, prompt_file):
             print(f"!!! CRITICAL: Could not load or parse question file {questions_path}. Error: {e}")
             # Return empty data to prevent a hard crash
             _questions_data = {"questions": []}
+        # Index questions by ID once so lookups don't scan the list on every request
+        # (first occurrence wins on duplicate IDs, as with a linear scan)
+        _questions_by_id = {}
+        for q in _questions_data.get('questions', []):
+            _questions_by_id.setdefault(q['id'], q)
+        # Precompute option labels so answer codes resolve with a single dict lookup
+        for q in _questions_by_id.values():
+            if q.get('options'):
+                get_option_labels(q)
 
     # Load AI prompt file if not cached
     if not _ai_prompt:
@@ -57,21 +69,40 @@ def find_question_by_id(question_id):
     """
     @brief Finds a question by its unique ID from the globally loaded question data.
     
-    @details It searches through the `questions` list within the global `questions_data` dictionary.
-             This function assumes that all questions, including those prefixed with "MET.", are
-             located in this single flat list.
+    @details It looks the ID up in the `_questions_by_id` index, which `load_questions_data` builds
+             from the `questions` list of the global `questions_data` dictionary. This function assumes
+             that all questions, including those prefixed with "MET.", are located in this single flat list.
     
     @param question_id (str): The unique identifier for the question (e.g., "SG01", "MET.LOC").
     
-    @globals_read questions_data: Requires this global to be populated by `load_questions_data`.
+    @globals_read _questions_by_id: Requires this global to be populated by `load_questions_data`.
     
     @returns {dict|None}: The question object (as a dictionary) if found, otherwise `None`.
     
     @related load_questions_data: Depends on `load_questions_data` to have been called successfully.
     """
-    if not _questions_data or 'questions' not in _questions_data:
-        return None
-    return next((q for q in _questions_data['questions'] if q['id'] == question_id), None)
+    return _questions_by_id.get(question_id)
+
+def get_option_labels(question):
+    """
+    @brief Returns the question's option code to label mapping, building it on first use.
+    
+    @details The mapping is stored on the question object under `_code_to_label`, so it is built
+             once per question (normally by `load_questions_data`) instead of walking `options` for
+             every answer. It keeps the order of `options`, and if a code appears more than once the
+             first label wins, matching a linear scan.
+    
+    @param question (dict): The question object with an `options` list of `{code, label}` entries.
+    
+    @returns {dict}: A dictionary mapping each option code to its label.
+    """
+    code_to_label = question.get('_code_to_label')
+    if code_to_label is None:
+        code_to_label = {}
+        for option in question.get('options') or []:
+            code_to_label.setdefault(option['code'], option['label'])
+        question['_code_to_label'] = code_to_label
+    return code_to_label
 
 def get_readable_answer(question, answer_value):
     """
@@ -79,7 +110,8 @@ def get_readable_answer(question, answer_value):
     
     @details This function enhances the raw answer data before sending it to the AI. For answers
              that come from a predefined set of options (e.g., 'yes-no', 'choice-single'), it
-             looks up the corresponding 'label' from the question's 'options' list. For other
+             looks up the corresponding 'label' via the question's precomputed code to label
+             mapping (see `get_option_labels`). For other
              types (like free text), it returns the value as is.
     
     @param question (dict): The question object, which contains metadata like `question_type` and `options`.
@@ -97,13 +129,27 @@ def get_readable_answer(question, answer_value):
         return 'Yes' if answer_value == 'yes' else 'No'
     
     if isinstance(answer_value, list) and options:
-        labels = [opt['label'] for opt in options if opt['code'] in answer_value]
+        # Answers are unvalidated client JSON; unhashable entries (e.g. dicts) can never equal
+        # an option code, so they are skipped rather than allowed to break the set.
+        selected = set()
+        for value in answer_value:
+            try:
+                selected.add(value)
+            except TypeError:
+                continue
+        labels = [label for code, label in get_option_labels(question).items() if code in selected]
         return ', '.join(labels)
 
     if options:
-        for option in options:
-            if option['code'] == answer_value:
-                return option['label']
+        code_to_label = get_option_labels(question)
+        try:
+            if answer_value in code_to_label:
+                return code_to_label[answer_value]
+        except TypeError:
+            # Unhashable value: fall back to comparing against each option code
+            for option in options:
+                if option['code'] == answer_value:
+                    return option['label']
     
     return answer_value
 
@@ -120,7 +166,8 @@ def evaluate_answer_logic(question_id, all_answers, config, question_file, promp
                 question's `ai_context`.
              4. Sends this prompt to the OpenAI Chat Completions API.
              5. Implements a robust retry mechanism with exponential backoff to handle API rate limits
-                gracefully, ensuring the request eventually succeeds without failing immediately.
+                gracefully. The number of attempts and the delays come from `Backend.retry_logic` in
+                the app config, so a persistently throttled API fails the request instead of retrying forever.
     
     @param question_id (str): The ID of the question being evaluated.
     @param all_answers (dict): A dictionary of all user-provided answers, used to fetch context.
@@ -129,7 +176,8 @@ def evaluate_answer_logic(question_id, all_answers, config, question_file, promp
     @returns {dict}: A dictionary containing the 'score' and 'explanation' from the AI's JSON response.
     
     @raises ValueError: If the question with the given ID is not found in the loaded data.
-    @raises Exception: For non-rate-limit related API errors after exhausting retries.
+    @raises RateLimitError: If the API is still rate limiting after `max_attempts` attempts.
+    @raises Exception: For non-rate-limit related API errors.
     
     @side_effects Makes one or more external API calls to OpenAI.
     
@@ -193,26 +241,32 @@ Return ONLY a single JSON object with 'score' (0-100) and 'explanation' (string)
 """
 
     # --- OpenAI API Call with Retry Logic ---
-    client = OpenAI(api_key=os.getenv("REACT_APP_GPT_KEY"), project=os.getenv("REACT_APP_PROJECT_ID"))
+    client = get_openai_client()
+    debug_enabled = is_openai_debug_enabled()
     
     openai_config = config.get("Backend", {}).get("openai", {})
     model = openai_config.get("simple_evaluate_model", "gpt-4-1106-preview")
     temperature = openai_config.get("default_temperature", 0.3)
     max_tokens = openai_config.get("default_max_tokens", 1024)
 
+    retry_config = config.get("Backend", {}).get("retry_logic", {})
+    max_attempts = retry_config.get("max_attempts", 5)
+    initial_delay = float(retry_config.get("initial_delay_seconds", 1.0))  # seconds
+    max_delay = float(retry_config.get("max_delay_seconds", 30.0))         # seconds
+
+    messages = [
+        {"role": "system", "content": payload['system']},
+        {"role": "user", "content": full_prompt}
+    ]
+
     attempt = 0
-    initial_delay = 1.0  # seconds
-    max_delay = 30.0     # seconds
 
     while True:
         try:
-            messages=[
-                {"role": "system", "content": payload['system']},
-                {"role": "user", "content": full_prompt}
-            ]
-            print("\n--- DEBUG: OpenAI Request (Simple Evaluate) ---")
-            print(json.dumps({"model": model, "messages": messages}, indent=2))
-            print("-----------------------------------------------\n")
+            if debug_enabled:
+                print("\n--- DEBUG: OpenAI Request (Simple Evaluate) ---")
+                print(json.dumps({"model": model, "messages": messages}, indent=2))
+                print("-----------------------------------------------\n")
 
             completion = client.chat.completions.create(
                 messages=messages,
@@ -222,13 +276,17 @@ Return ONLY a single JSON object with 'score' (0-100) and 'explanation' (string)
                 max_tokens=max_tokens
             )
             response_content = completion.choices[0].message.content
-            print("\n--- DEBUG: OpenAI Response (Simple Evaluate) ---")
-            print(response_content)
-            print("------------------------------------------------\n")
+            if debug_enabled:
+                print("\n--- DEBUG: OpenAI Response (Simple Evaluate) ---")
+                print(response_content)
+                print("------------------------------------------------\n")
             return json.loads(response_content)
 
         except RateLimitError as e:
             attempt += 1
+            if attempt >= max_attempts:
+                print(f"Rate limit exceeded. Giving up after {attempt} attempts.")
+                raise
             
             # Extract retry-after-ms header if available
             retry_after_ms_str = e.response.headers.get('retry-after-ms')